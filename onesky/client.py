@@ -1,10 +1,23 @@
+import base64
 import hashlib
+import json
+import multiprocessing.pool
 import os
-import requests
+import re
 import time
 
+import models
+import transport as transport_module
+
 DEFAULT_API_URL = 'https://platform.api.onesky.io/1/'
 
+# bytes read from the socket at a time when saving a downloaded file.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# bytes of an image read at a time when base64-encoding a screenshot upload.
+# must be a multiple of 3 so that the encoded chunks can just be concatenated.
+SCREENSHOT_CHUNK_SIZE = 3 * 16 * 1024
+
 
 # python wrapper for OneSky's REST API, see
 # https://github.com/onesky/api-documentation-platform
@@ -12,13 +25,25 @@ class Client:
     def __init__(self, api_key, api_secret,
                  api_url=DEFAULT_API_URL,
                  download_dir='.',
-                 request_callback=None):
+                 request_callback=None,
+                 transport=None,
+                 response_models=False):
         self.api_url = api_url
         self.api_key = api_key
         self.api_secret = api_secret
         self.download_dir = download_dir
         self.request_callback = request_callback
 
+        # see transport.py.  by default, requests are sent with the requests
+        # library.
+        if transport is None:
+            transport = transport_module.RequestsTransport()
+        self.transport = transport
+
+        # see models.py.  if set, endpoints that have a model return an
+        # ApiResponse instead of a dictionary.
+        self.response_models = response_models
+
     def create_auth_variables(self):
         timestamp = str(int(time.time()))
 
@@ -33,7 +58,8 @@ class Client:
         }
 
     def do_http_request(self, relative_url, parameters=None, method='GET',
-                        upload_file_stream=None):
+                        upload_file_stream=None, partial_filename=None,
+                        body=None, model=None):
         absolute_url = self.api_url + relative_url
 
         # the auth variables and any additional parameters are merged and
@@ -53,34 +79,69 @@ class Client:
         else:
             files = None
 
+        # if a previous download was interrupted, 'partial_filename' holds the
+        # bytes we already have.  ask the server for just the remainder.
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        resume_offset = 0
+        if partial_filename is not None:
+            # ranges are byte offsets into the raw body, so don't let the
+            # server compress it underneath us.
+            headers['Accept-Encoding'] = 'identity'
+            if os.path.exists(partial_filename):
+                validator = read_validator(partial_filename)
+                if validator is None:
+                    # without a validator there's no telling whether the file
+                    # has changed since, so the bytes we have are no use.
+                    os.remove(partial_filename)
+                else:
+                    resume_offset = os.path.getsize(partial_filename)
+            if resume_offset > 0:
+                # If-Range makes the server send the whole file (with a 200)
+                # if it has changed since the partial download.
+                headers['Range'] = 'bytes={}-'.format(resume_offset)
+                headers['If-Range'] = validator
+
         if self.request_callback:
             self.request_callback(method, absolute_url, url_parameters)
 
-        # method is something like GET or POST or DELETE, for which we grab the
-        # appropriate function from the requests library.
-        request_function = getattr(requests, method.lower())
-        response = request_function(absolute_url,
-                                    params=url_parameters,
-                                    files=files)
+        response = self.transport.request(method, absolute_url,
+                                          params=url_parameters,
+                                          files=files,
+                                          headers=headers,
+                                          data=body)
+
+        if resume_offset > 0 and (
+                response.status_code == 416 or
+                (response.status_code == 206 and
+                 content_range_start(response) != resume_offset)):
+            # either the range we asked for is past the end of the file, or
+            # the server sent a different range than the one we asked for.
+            # either way the partial file is no use, so throw it away and
+            # start over.
+            response.close()
+            os.remove(partial_filename)
+            remove_validator(partial_filename)
+            return self.do_http_request(relative_url, parameters, method,
+                                        upload_file_stream, partial_filename,
+                                        body, model)
 
         if (response.headers.get('content-disposition', '').
                 startswith('attachment;')):
             # the response body is the contents of a file.  We save to a file
             # here and return 'filename' in the response dictionary.
-
-            # the filename is in the 'content-disposition' header, in the form
-            # "attachment; filename=hi-IN.po".  simplest to just split on = to
-            # find it.
-            short_filename = (
-                response.headers['content-disposition'].split('=')[1]
-            )
-
-            absolute_filename = os.path.join(self.download_dir, short_filename)
-            with open(absolute_filename, 'wb') as f:
-                for chunk in response.iter_content():
-                    f.write(chunk)
-
+            absolute_filename = self.save_attachment(response,
+                                                     partial_filename,
+                                                     resume_offset)
             response_dict = {'downloaded_filename': absolute_filename}
+        elif self.response_models and model is not None:
+            # the body is parsed as it's read; see models.ApiResponse.
+            try:
+                response_dict = models.ApiResponse(
+                    response.iter_content(DOWNLOAD_CHUNK_SIZE), model)
+            except ValueError:
+                response_dict = {}
         else:
             # a json response is requested.  some requests (such as
             # project_group_delete) don't return anything, so we'll just return
@@ -92,21 +153,93 @@ class Client:
 
         return (response.status_code, response_dict)
 
+    # writes the body of an attachment response into download_dir and returns
+    # the absolute filename.  the body goes to 'partial_filename' first (which
+    # is appended to if the server honored our Range request), and is only
+    # renamed into place once we have as many bytes as the server promised.
+    # if we come up short, an IOError is raised and the partial file is left
+    # behind so that the next request can resume from where this one stopped.
+    def save_attachment(self, response, partial_filename=None,
+                        resume_offset=0):
+        # the filename is in the 'content-disposition' header, in the form
+        # "attachment; filename=hi-IN.po".  simplest to just split on = to
+        # find it.
+        short_filename = (
+            response.headers['content-disposition'].split('=', 1)[1]
+        ).strip().strip('"')
+        short_filename = os.path.basename(short_filename)
+
+        absolute_filename = os.path.join(self.download_dir, short_filename)
+        if partial_filename is None:
+            partial_filename = absolute_filename + '.part'
+
+        # 206 means we got the rest of the file starting at resume_offset;
+        # anything else is the whole file, so start from scratch.
+        if response.status_code != 206:
+            resume_offset = 0
+
+        expected_size = None
+        content_range = response.headers.get('content-range')
+        content_length = response.headers.get('content-length')
+        if response.status_code == 206 and content_range:
+            # "bytes 100-999/1000"
+            total = content_range.rsplit('/', 1)[-1]
+            if total.isdigit():
+                expected_size = int(total)
+        elif (content_length and content_length.isdigit() and
+                response.headers.get('content-encoding',
+                                     'identity') == 'identity'):
+            expected_size = resume_offset + int(content_length)
+
+        if resume_offset > 0:
+            mode = 'ab'
+        else:
+            # starting over, so remember which version of the file this is
+            # in case we have to resume it later.
+            mode = 'wb'
+            write_validator(partial_filename, response)
+
+        with open(partial_filename, mode) as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+
+        actual_size = os.path.getsize(partial_filename)
+        if expected_size is not None and actual_size != expected_size:
+            if read_validator(partial_filename) is None:
+                # see do_http_request; this can't be resumed.
+                advice = ('the server sent no ETag or Last-Modified, so '
+                          'repeating the request will start over')
+            else:
+                advice = 'repeat the request to resume'
+            raise IOError(
+                'incomplete download of {}: got {} of {} bytes; {}'.format(
+                    short_filename, actual_size, expected_size, advice))
+
+        # os.rename won't overwrite an existing file on windows.
+        if os.path.exists(absolute_filename):
+            os.remove(absolute_filename)
+        os.rename(partial_filename, absolute_filename)
+        remove_validator(partial_filename)
+
+        return absolute_filename
+
     ################################################################
     # project group API
     def project_group_list(self, page=None, per_page=None):
         relative_url = 'project-groups'
         params = {'page': page, 'per_page': per_page}
-        return self.do_http_request(relative_url, params)
+        return self.do_http_request(relative_url, params,
+                                    model=models.ProjectGroup)
 
     def project_group_show(self, project_group_id):
         relative_url = 'project-groups/{}'.format(project_group_id)
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.ProjectGroup)
 
     def project_group_create(self, name, locale=None):
         relative_url = 'project-groups'
         params = {'name': name, 'locale': locale}
-        return self.do_http_request(relative_url, params, method='POST')
+        return self.do_http_request(relative_url, params, method='POST',
+                                    model=models.ProjectGroup)
 
     def project_group_delete(self, project_group_id):
         relative_url = 'project-groups/{}'.format(project_group_id)
@@ -114,7 +247,7 @@ class Client:
 
     def project_group_languages(self, project_group_id):
         relative_url = 'project-groups/{}/languages'.format(project_group_id)
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.Locale)
     ################################################################
 
     ################################################################
@@ -122,18 +255,19 @@ class Client:
     def project_list(self, project_group_id, page=None, per_page=None):
         relative_url = 'project-groups/{}/projects'.format(project_group_id)
         params = {'page': page, 'per_page': per_page}
-        return self.do_http_request(relative_url, params)
+        return self.do_http_request(relative_url, params, model=models.Project)
 
     def project_show(self, project_id):
         relative_url = 'projects/{}'.format(project_id)
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.Project)
 
     def project_create(self, project_group_id, project_type,
                        name=None, description=None):
         relative_url = 'project-groups/{}/projects'.format(project_group_id)
         params = {'project_type': project_type,
                   'name': name, 'description': description}
-        return self.do_http_request(relative_url, params, method='POST')
+        return self.do_http_request(relative_url, params, method='POST',
+                                    model=models.Project)
 
     def project_update(self, project_id, name=None, description=None):
         relative_url = 'projects/{}'.format(project_id)
@@ -146,7 +280,7 @@ class Client:
 
     def project_languages(self, project_id):
         relative_url = 'projects/{}/languages'.format(project_id)
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.Locale)
     ################################################################
 
     # project type
@@ -158,7 +292,7 @@ class Client:
     def file_list(self, project_id, page=None, per_page=None):
         relative_url = 'projects/{}/files'.format(project_id)
         params = {'page': page, 'per_page': per_page}
-        return self.do_http_request(relative_url, params)
+        return self.do_http_request(relative_url, params, model=models.File)
 
     # file_name must be a file that can be read with open().  Allowed
     # file_formats are listed in the documentation; I'm using GNU_POT a lot for
@@ -182,14 +316,27 @@ class Client:
     ################################################################
     # translation
 
-    # TODO: this doesn't actually work; we need to get the file out of the
-    # payload that's returned.
+    # the exported file is saved in download_dir, and its name is returned as
+    # 'downloaded_filename'.  while OneSky is still generating the file it
+    # answers with a json body (and a 202) instead, which is returned as-is.
+    # if the download is cut off, an IOError is raised; calling this again
+    # with the same arguments resumes from the bytes already on disk.
     def translation_export(self, project_id, locale,
                            source_file_name, export_file_name=None):
         relative_url = 'projects/{}/translations'.format(project_id)
         params = {'locale': locale, 'source_file_name': source_file_name,
                   'export_file_name': export_file_name}
-        return self.do_http_request(relative_url, params)
+
+        # we don't learn the real filename until the response arrives, so the
+        # partial file is named after the request instead.
+        partial_filename = os.path.join(
+            self.download_dir,
+            '.{}-{}-{}.part'.format(
+                project_id, locale,
+                os.path.basename(export_file_name or source_file_name)))
+
+        return self.do_http_request(relative_url, params,
+                                    partial_filename=partial_filename)
 
     def translation_status(self, project_id, file_name, locale):
         relative_url = 'projects/{}/translations/status'.format(project_id)
@@ -203,19 +350,55 @@ class Client:
                          status=None):
         relative_url = 'projects/{}/import-tasks'.format(project_id)
         params = {'page': page, 'per_page': per_page, 'status': status}
-        return self.do_http_request(relative_url, params)
+        return self.do_http_request(relative_url, params,
+                                    model=models.ImportTask)
 
     def import_task_show(self, project_id, import_id):
         relative_url = 'projects/{}/import-tasks/{}'.format(
             project_id, import_id
         )
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.ImportTask)
     ################################################################
 
+    ################################################################
     # screenshot
+
+    # 'screenshots' is a list of dictionaries, each with an 'image' (a file
+    # name that can be read with open()), and optionally a 'name' (defaults to
+    # the image's file name) and a list of 'tags'.  each tag marks where a
+    # string appears in the image:
+    #   {'key': 'hello', 'x': 0, 'y': 0, 'width': 100, 'height': 20,
+    #    'file': 'strings.po'}
+    # all of the screenshots are sent in a single request.  an IOError is
+    # raised before anything is sent if any of the images can't be read.
     def screenshot_upload(self, project_id, screenshots):
-        # wrapper for the screenshot stuff is not yet implemented
-        pass
+        check_screenshots(screenshots)
+        relative_url = 'projects/{}/screenshots'.format(project_id)
+        return self.do_http_request(relative_url, method='POST',
+                                    body=encode_screenshots(screenshots))
+
+    # uploads any number of screenshots, 'batch_size' per request, with up to
+    # 'threads' requests in flight at once.  returns a list with the
+    # (status_code, response) of each batch, in order.  as with
+    # screenshot_upload, nothing is sent if any of the images can't be read.
+    def screenshot_upload_batched(self, project_id, screenshots,
+                                  batch_size=10, threads=4):
+        check_screenshots(screenshots)
+        batches = [screenshots[i:i + batch_size]
+                   for i in range(0, len(screenshots), batch_size)]
+        if len(batches) <= 1 or threads <= 1:
+            return [self.screenshot_upload(project_id, batch)
+                    for batch in batches]
+
+        pool = multiprocessing.pool.ThreadPool(min(threads, len(batches)))
+        try:
+            return pool.map(
+                lambda batch: self.screenshot_upload(project_id, batch),
+                batches)
+        finally:
+            pool.close()
+            pool.join()
+    ################################################################
 
     # quotation
     def quotation_show(self, project_id,
@@ -238,13 +421,13 @@ class Client:
     def order_list(self, project_id, page=None, per_page=None):
         relative_url = 'projects/{}/orders'.format(project_id)
         params = {'page': page, 'per_page': per_page}
-        return self.do_http_request(relative_url, params)
+        return self.do_http_request(relative_url, params, model=models.Order)
 
     def order_show(self, project_id, order_id):
         relative_url = 'projects/{}/orders/{}'.format(
             project_id, order_id
         )
-        return self.do_http_request(relative_url)
+        return self.do_http_request(relative_url, model=models.Order)
 
     def order_create(self, project_id,
                      files, to_locale,
@@ -272,9 +455,86 @@ class Client:
                   'tone': tone,
                   'specialization': specialization,
                   'note': note}
-        return self.do_http_request(relative_url, params, 'POST')
+        return self.do_http_request(relative_url, params, 'POST',
+                                    model=models.Order)
     ################################################################
 
     # locale
     def locale_list(self):
-        return self.do_http_request('locales')
+        return self.do_http_request('locales', model=models.Locale)
+
+
+# returns the first byte offset of a 206 response's Content-Range header
+# ("bytes 100-999/1000"), or None if it's missing or malformed.
+def content_range_start(response):
+    content_range = response.headers.get('content-range', '')
+    match = re.match(r'bytes\s+(\d+)-', content_range)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+# a partial download is only resumed if the server gave us a validator (a
+# strong ETag, or failing that Last-Modified) for it, which is kept next to
+# the partial file and sent back in If-Range.
+def validator_filename(partial_filename):
+    return partial_filename + '.validator'
+
+
+def read_validator(partial_filename):
+    try:
+        with open(validator_filename(partial_filename), 'rb') as f:
+            return f.read().strip() or None
+    except IOError:
+        return None
+
+
+def write_validator(partial_filename, response):
+    validator = response.headers.get('etag')
+    if validator is None or validator.startswith('W/'):
+        # weak ETags can't be used with If-Range.
+        validator = response.headers.get('last-modified')
+
+    if validator is None:
+        remove_validator(partial_filename)
+    else:
+        with open(validator_filename(partial_filename), 'wb') as f:
+            f.write(validator)
+
+
+def remove_validator(partial_filename):
+    if os.path.exists(validator_filename(partial_filename)):
+        os.remove(validator_filename(partial_filename))
+
+
+# the images are only read while the request is being sent, by which time
+# other batches may already have been uploaded, so make sure they're all
+# there first.
+def check_screenshots(screenshots):
+    for screenshot in screenshots:
+        # raises IOError if the image is missing or unreadable.
+        open(screenshot['image'], 'rb').close()
+
+
+# generates the json body for a screenshot upload a piece at a time, so that
+# the images are read and base64-encoded as the request is sent rather than
+# all being loaded into memory first.
+def encode_screenshots(screenshots):
+    yield '{"screenshots": ['
+    for i, screenshot in enumerate(screenshots):
+        if i > 0:
+            yield ', '
+
+        image_filename = screenshot['image']
+        name = screenshot.get('name') or os.path.basename(image_filename)
+        yield '{{"name": {}, "image": "'.format(json.dumps(name))
+
+        with open(image_filename, 'rb') as f:
+            while True:
+                chunk = f.read(SCREENSHOT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+
+        yield '", "tags": {}}}'.format(json.dumps(screenshot.get('tags', [])))
+    yield ']}'
@@ -0,0 +1,457 @@
+import base64
+import json
+import os
+import re
+import threading
+import time
+import urlparse
+
+import requests
+
+import client
+
+
+# in-memory stand-in for the OneSky API.  pass an instance as the 'transport'
+# of a Client, and requests are answered from local state instead of going
+# over the network:
+#
+#   fake = onesky.fake.FakeTransport()
+#   c = onesky.client.Client(api_key, api_secret, transport=fake)
+#   status, response = c.project_group_create('My Group')
+#
+# project groups, projects, files, import tasks and screenshots are kept and
+# behave roughly like the real thing; anything else gets a 404.  responses
+# follow the shapes in the OneSky documentation closely enough for tests and
+# load simulations, but only a subset of the fields are filled in.
+#
+# by default, an import task is completed as soon as its file is uploaded.
+# with auto_complete_imports=False, import tasks stay 'in-progress' until
+# complete_import_task() is called, which is handy for testing code that
+# waits on them.
+
+
+DEFAULT_PER_PAGE = 50
+
+PROJECT_TYPES = [
+    {'code': 'website', 'name': 'Website'},
+    {'code': 'ios', 'name': 'iOS App'},
+    {'code': 'android', 'name': 'Android App'},
+    {'code': 'game', 'name': 'Game'},
+    {'code': 'others', 'name': 'Others'},
+]
+
+
+# mimics the parts of a requests Response that the Client uses.
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict()
+        if body is None:
+            self.content = ''
+        else:
+            self.content = json.dumps(body)
+            self.headers['content-type'] = 'application/json'
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeTransport:
+    def __init__(self, api_url=client.DEFAULT_API_URL,
+                 base_locale='en-US',
+                 auto_complete_imports=True):
+        self.api_path = urlparse.urlparse(api_url).path
+        self.base_locale = base_locale
+        self.auto_complete_imports = auto_complete_imports
+
+        self.project_groups = {}
+        self.projects = {}
+        self.files = {}
+        self.import_tasks = {}
+        self.screenshots = {}
+        self.next_id = 1
+        self.request_url = None
+
+        # requests may come in from several threads at once.
+        self.lock = threading.Lock()
+
+        # (method, url pattern, handler).  each group in the pattern is passed
+        # to the handler as an integer id, followed by the url parameters.
+        self.routes = [
+            ('GET', r'project-groups', self.project_group_list),
+            ('POST', r'project-groups', self.project_group_create),
+            ('GET', r'project-groups/(\d+)', self.project_group_show),
+            ('DELETE', r'project-groups/(\d+)', self.project_group_delete),
+            ('GET', r'project-groups/(\d+)/languages',
+             self.project_group_languages),
+            ('GET', r'project-groups/(\d+)/projects', self.project_list),
+            ('POST', r'project-groups/(\d+)/projects', self.project_create),
+            ('GET', r'projects/(\d+)', self.project_show),
+            ('PUT', r'projects/(\d+)', self.project_update),
+            ('DELETE', r'projects/(\d+)', self.project_delete),
+            ('GET', r'projects/(\d+)/languages', self.project_languages),
+            ('GET', r'project-types', self.project_type_list),
+            ('GET', r'projects/(\d+)/files', self.file_list),
+            ('POST', r'projects/(\d+)/files', self.file_upload),
+            ('DELETE', r'projects/(\d+)/files', self.file_delete),
+            ('GET', r'projects/(\d+)/import-tasks', self.import_task_list),
+            ('GET', r'projects/(\d+)/import-tasks/(\d+)',
+             self.import_task_show),
+            ('POST', r'projects/(\d+)/screenshots', self.screenshot_upload),
+        ]
+        self.routes = [(method, re.compile(pattern + '$'), handler)
+                       for (method, pattern, handler) in self.routes]
+
+    def request(self, method, url, params=None, files=None, headers=None,
+                data=None):
+        path = urlparse.urlparse(url).path
+        if not path.startswith(self.api_path):
+            return self.error(404, 'Not found')
+        path = path[len(self.api_path):]
+
+        params = dict(params or {})
+        if files and 'file' in files:
+            params['file'] = files['file']
+        if data is not None:
+            # the body may be a generator, as it is for screenshot uploads.
+            if not isinstance(data, basestring):
+                data = ''.join(data)
+            try:
+                params['body'] = json.loads(data)
+            except ValueError:
+                return self.error(400, 'Invalid json body')
+
+        for (route_method, pattern, handler) in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method.upper():
+                ids = [int(group) for group in match.groups()]
+                with self.lock:
+                    # for the page links in paginate().
+                    self.request_url = url.split('?', 1)[0]
+                    return handler(*ids, **params)
+
+        return self.error(404, 'Not found')
+
+    # marks an import task as finished.  'status' is either 'completed' or
+    # 'failed'.
+    def complete_import_task(self, import_id, status='completed'):
+        with self.lock:
+            self.import_tasks[int(import_id)]['status'] = status
+
+    ################################################################
+    # helpers
+    def new_id(self):
+        new_id = self.next_id
+        self.next_id += 1
+        return new_id
+
+    def ok(self, data=None, status_code=200, meta=None):
+        body_meta = {'status': status_code}
+        body_meta.update(meta or {})
+        return FakeResponse(status_code, {'meta': body_meta, 'data': data})
+
+    def error(self, status_code, message):
+        return FakeResponse(status_code, {
+            'meta': {'status': status_code, 'message': message},
+            'data': {}
+        })
+
+    def paginate(self, items, page=None, per_page=None):
+        page = int(page or 1)
+        per_page = int(per_page or DEFAULT_PER_PAGE)
+        page_count = max(1, (len(items) + per_page - 1) // per_page)
+        start = (page - 1) * per_page
+
+        meta = {
+            'record_count': len(items),
+            'page_count': page_count,
+            'first_page': None,
+            'prev_page': None,
+            'next_page': None,
+            'last_page': None,
+        }
+
+        # like OneSky, the page links are urls rather than page numbers.
+        def page_url(n):
+            return '{}?page={}&per_page={}'.format(self.request_url, n,
+                                                   per_page)
+
+        if page_count > 1:
+            meta['first_page'] = page_url(1)
+            meta['last_page'] = page_url(page_count)
+            if page > 1:
+                meta['prev_page'] = page_url(page - 1)
+            if page < page_count:
+                meta['next_page'] = page_url(page + 1)
+
+        return self.ok(items[start:start + per_page], meta=meta)
+
+    def language(self, locale):
+        return {'code': locale, 'locale': locale.split('-')[0],
+                'region': locale.split('-')[-1] if '-' in locale else '',
+                'english_name': locale, 'local_name': locale,
+                'is_base_language': locale == self.base_locale,
+                'is_ready_to_publish': True,
+                'translation_progress': '100%'}
+
+    def timestamp(self):
+        now = int(time.time())
+        return (time.strftime('%Y-%m-%dT%H:%M:%S+0000', time.gmtime(now)),
+                now)
+    ################################################################
+
+    ################################################################
+    # project group API
+    def project_group_list(self, page=None, per_page=None, **kwargs):
+        groups = [{'id': group['id'], 'name': group['name']}
+                  for (_, group) in sorted(self.project_groups.items())]
+        return self.paginate(groups, page, per_page)
+
+    def project_group_create(self, name=None, locale=None, **kwargs):
+        if not name:
+            return self.error(400, 'name is required')
+
+        group = {'id': self.new_id(), 'name': name,
+                 'base_language': self.language(locale or self.base_locale)}
+        self.project_groups[group['id']] = group
+        return self.ok(group, status_code=201)
+
+    def project_group_show(self, project_group_id, **kwargs):
+        group = self.project_groups.get(project_group_id)
+        if group is None:
+            return self.error(404, 'Project group not found')
+
+        project_count = len([p for p in self.projects.values()
+                             if p['project_group_id'] == project_group_id])
+        data = dict(group)
+        data['project_count'] = project_count
+        return self.ok(data)
+
+    def project_group_delete(self, project_group_id, **kwargs):
+        if project_group_id not in self.project_groups:
+            return self.error(404, 'Project group not found')
+
+        for project_id, project in self.projects.items():
+            if project['project_group_id'] == project_group_id:
+                self.project_delete(project_id)
+        del self.project_groups[project_group_id]
+        return FakeResponse(200)
+
+    def project_group_languages(self, project_group_id, **kwargs):
+        group = self.project_groups.get(project_group_id)
+        if group is None:
+            return self.error(404, 'Project group not found')
+        return self.ok([group['base_language']],
+                       meta={'record_count': 1})
+    ################################################################
+
+    ################################################################
+    # project API
+    def project_list(self, project_group_id, page=None, per_page=None,
+                     **kwargs):
+        if project_group_id not in self.project_groups:
+            return self.error(404, 'Project group not found')
+
+        projects = [{'id': project['id'], 'name': project['name']}
+                    for (_, project) in sorted(self.projects.items())
+                    if project['project_group_id'] == project_group_id]
+        return self.paginate(projects, page, per_page)
+
+    def project_create(self, project_group_id, project_type=None, name=None,
+                       description=None, **kwargs):
+        if project_group_id not in self.project_groups:
+            return self.error(404, 'Project group not found')
+
+        matching_types = [t for t in PROJECT_TYPES
+                          if t['code'] == project_type]
+        if not matching_types:
+            return self.error(400, 'Invalid project type')
+
+        project = {'id': self.new_id(),
+                   'project_group_id': project_group_id,
+                   'name': name or '',
+                   'description': description or '',
+                   'project_type': matching_types[0]}
+        self.projects[project['id']] = project
+
+        data = dict(project)
+        del data['project_group_id']
+        return self.ok(data, status_code=201)
+
+    def project_show(self, project_id, **kwargs):
+        project = self.projects.get(project_id)
+        if project is None:
+            return self.error(404, 'Project not found')
+
+        data = dict(project)
+        del data['project_group_id']
+        data['string_count'] = sum(
+            f['string_count'] for f in self.files.values()
+            if f['project_id'] == project_id)
+        data['word_count'] = sum(
+            f['word_count'] for f in self.files.values()
+            if f['project_id'] == project_id)
+        return self.ok(data)
+
+    def project_update(self, project_id, name=None, description=None,
+                       **kwargs):
+        project = self.projects.get(project_id)
+        if project is None:
+            return self.error(404, 'Project not found')
+
+        if name is not None:
+            project['name'] = name
+        if description is not None:
+            project['description'] = description
+        return FakeResponse(200)
+
+    def project_delete(self, project_id, **kwargs):
+        if project_id not in self.projects:
+            return self.error(404, 'Project not found')
+
+        for key, f in self.files.items():
+            if f['project_id'] == project_id:
+                del self.files[key]
+        for import_id, task in self.import_tasks.items():
+            if task['project_id'] == project_id:
+                del self.import_tasks[import_id]
+        del self.projects[project_id]
+        return FakeResponse(200)
+
+    def project_languages(self, project_id, **kwargs):
+        project = self.projects.get(project_id)
+        if project is None:
+            return self.error(404, 'Project not found')
+
+        group = self.project_groups[project['project_group_id']]
+        return self.ok([group['base_language']],
+                       meta={'record_count': 1})
+
+    def project_type_list(self, **kwargs):
+        return self.ok(PROJECT_TYPES,
+                       meta={'record_count': len(PROJECT_TYPES)})
+    ################################################################
+
+    ################################################################
+    # file API
+    def file_list(self, project_id, page=None, per_page=None, **kwargs):
+        if project_id not in self.projects:
+            return self.error(404, 'Project not found')
+
+        files = []
+        for (_, file_name), f in sorted(self.files.items()):
+            if f['project_id'] != project_id:
+                continue
+            task = self.import_tasks[f['import_id']]
+            files.append({'file_name': file_name,
+                          'string_count': f['string_count'],
+                          'last_import': {'id': task['id'],
+                                          'status': task['status']},
+                          'uploaded_at': f['uploaded_at'],
+                          'uploaded_at_timestamp':
+                              f['uploaded_at_timestamp']})
+        return self.paginate(files, page, per_page)
+
+    def file_upload(self, project_id, file=None, file_format=None,
+                    locale=None, is_keeping_all_strings=None, **kwargs):
+        if project_id not in self.projects:
+            return self.error(404, 'Project not found')
+        if file is None or not file_format:
+            return self.error(400, 'file and file_format are required')
+
+        file_name = os.path.basename(getattr(file, 'name', 'file'))
+        content = file.read()
+        locale = locale or self.base_locale
+        (uploaded_at, uploaded_at_timestamp) = self.timestamp()
+
+        # a rough count is plenty for a fake.
+        string_count = content.count('msgid') or len(content.splitlines())
+        word_count = len(content.split())
+
+        task = {'id': self.new_id(),
+                'project_id': project_id,
+                'file': {'name': file_name,
+                         'format': file_format,
+                         'locale': self.language(locale)},
+                'string_count': string_count,
+                'word_count': word_count,
+                'status': ('completed' if self.auto_complete_imports
+                           else 'in-progress'),
+                'created_at': uploaded_at,
+                'created_at_timestamp': uploaded_at_timestamp}
+        self.import_tasks[task['id']] = task
+
+        self.files[(project_id, file_name)] = {
+            'project_id': project_id,
+            'content': content,
+            'string_count': string_count,
+            'word_count': word_count,
+            'import_id': task['id'],
+            'uploaded_at': uploaded_at,
+            'uploaded_at_timestamp': uploaded_at_timestamp}
+
+        return self.ok({'name': file_name,
+                        'format': file_format,
+                        'language': self.language(locale),
+                        'import': {'id': task['id'],
+                                   'created_at': uploaded_at,
+                                   'created_at_timestamp':
+                                       uploaded_at_timestamp}},
+                       status_code=201)
+
+    def file_delete(self, project_id, file_name=None, **kwargs):
+        if (project_id, file_name) not in self.files:
+            return self.error(404, 'File not found')
+
+        del self.files[(project_id, file_name)]
+        return self.ok({'name': file_name})
+    ################################################################
+
+    ################################################################
+    # import task
+    def import_task_list(self, project_id, page=None, per_page=None,
+                         status=None, **kwargs):
+        if project_id not in self.projects:
+            return self.error(404, 'Project not found')
+
+        tasks = [{'id': task['id'],
+                  'file': {'name': task['file']['name']},
+                  'status': task['status'],
+                  'created_at': task['created_at'],
+                  'created_at_timestamp': task['created_at_timestamp']}
+                 for (_, task) in sorted(self.import_tasks.items())
+                 if task['project_id'] == project_id and
+                 status in (None, 'all', task['status'])]
+        return self.paginate(tasks, page, per_page)
+
+    def import_task_show(self, project_id, import_id, **kwargs):
+        task = self.import_tasks.get(import_id)
+        if task is None or task['project_id'] != project_id:
+            return self.error(404, 'Import task not found')
+
+        data = dict(task)
+        del data['project_id']
+        return self.ok(data)
+    ################################################################
+
+    ################################################################
+    # screenshot
+    def screenshot_upload(self, project_id, body=None, **kwargs):
+        if project_id not in self.projects:
+            return self.error(404, 'Project not found')
+        if not body or not body.get('screenshots'):
+            return self.error(400, 'screenshots are required')
+
+        for screenshot in body['screenshots']:
+            self.screenshots[(project_id, screenshot['name'])] = {
+                'image': base64.b64decode(screenshot['image']),
+                'tags': screenshot.get('tags', [])}
+        return FakeResponse(201)
+    ################################################################
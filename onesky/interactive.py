@@ -150,8 +150,32 @@ class Interpreter(cmd.Cmd):
     do_import_task_show = make_cmd('import_task_show',
                                    ['project_id', 'import_id'])
 
-    # wrapper for the screenshot stuff is not yet implemented
-    # do_screenshot =
+    # screenshots are passed to the client as a list, so this one can't be
+    # made with make_cmd.  tags can't be given on the command line.
+    def do_screenshot_upload(self, line):
+        try:
+            parameters = shlex.split(line)
+        except ValueError as e:
+            self.stdout.write('Parse error: {}\n'.format(e))
+            return
+
+        if len(parameters) < 2:
+            self.stdout.write(self.do_screenshot_upload.__doc__ + '\n')
+            return
+
+        project_id = parameters[0]
+        screenshots = [{'image': image} for image in parameters[1:]]
+
+        try:
+            for (status_code, response) in (
+                    self.client.screenshot_upload_batched(project_id,
+                                                          screenshots)):
+                self.print_response(status_code, response)
+        except IOError as e:
+            self.stdout.write('IOError: {}\n'.format(e))
+
+    do_screenshot_upload.__doc__ = (
+        'Usage: screenshot_upload <project_id> <image_file> [image_file ...]')
 
     do_quotation_show = make_cmd('quotation_show',
                                  ['project_id', 'files', 'to_locale'],
@@ -0,0 +1,301 @@
+import codecs
+import json
+import re
+
+
+# typed objects for API responses.  these are opt-in: create the Client with
+# response_models=True, and the endpoints that return one of the types below
+# return (status_code, ApiResponse) instead of (status_code, dictionary).
+#
+# the point is memory and speed on big lists.  each object only has room for
+# the fields listed in its __slots__, so it's much smaller than the dictionary
+# it was made from, and list responses are parsed as they're iterated, one
+# item at a time, straight off the network.  a list of tens of thousands of
+# files is never held in memory all at once, unless you keep the objects.
+
+
+class Model(object):
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for field in self.__slots__:
+            setattr(self, field, kwargs.get(field))
+
+    # fields that aren't in __slots__ are dropped.
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(obj, field, d.get(field))
+        return obj
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.__slots__)
+
+    # dictionary-style access, so that code written against the plain json
+    # responses keeps working.
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        if field not in self.__slots__:
+            return default
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{}={!r}'.format(field, getattr(self, field))
+                      for field in self.__slots__))
+
+
+class ProjectGroup(Model):
+    __slots__ = ('id', 'name', 'enabled_language_count', 'project_count',
+                 'base_language')
+
+
+class Project(Model):
+    __slots__ = ('id', 'name', 'description', 'project_type',
+                 'string_count', 'word_count')
+
+
+class File(Model):
+    __slots__ = ('file_name', 'string_count', 'last_import',
+                 'uploaded_at', 'uploaded_at_timestamp')
+
+
+class ImportTask(Model):
+    __slots__ = ('id', 'file', 'string_count', 'word_count', 'status',
+                 'created_at', 'created_at_timestamp')
+
+
+class Order(Model):
+    __slots__ = ('id', 'status', 'order_type', 'amount', 'files',
+                 'to_language', 'translator_type', 'quality', 'tone',
+                 'specialization', 'note', 'ordered_at',
+                 'ordered_at_timestamp')
+
+
+class Locale(Model):
+    __slots__ = ('code', 'english_name', 'local_name', 'locale', 'region',
+                 'is_base_language', 'is_ready_to_publish',
+                 'translation_progress', 'last_updated_at',
+                 'last_updated_at_timestamp')
+
+
+# a response from the API: {"meta": {...}, "data": ...}.  'data' is either a
+# single model object, or, for lists, an iterator that parses and returns
+# model objects one at a time as the response body is read.  like a file, it
+# can only be iterated once; use list(response.data) to keep the objects.
+class ApiResponse:
+    def __init__(self, chunks, model):
+        self.model = model
+        self.parser = JsonStreamParser(chunks)
+        self.fields = {}
+        self.data_iterator = None
+
+        self.parser.start_object()
+        self.read_fields()
+
+    @property
+    def meta(self):
+        if 'meta' not in self.fields:
+            # meta may come after the list in the body.
+            self.read_past_data()
+        return self.fields.get('meta', {})
+
+    # reads the rest of a list that hasn't been iterated yet, keeping its
+    # items, so that any keys after it in the body are available.
+    def read_past_data(self):
+        if self.data_iterator is not None:
+            items = list(self.data_iterator)
+            self.data_iterator = iter(items)
+
+    @property
+    def data(self):
+        if self.data_iterator is not None:
+            return self.data_iterator
+
+        data = self.fields.get('data')
+        if isinstance(data, dict) and self.model is not None:
+            return self.model.from_dict(data)
+        return data
+
+    # dictionary-style access, as for Model.  as with a dictionary, a key
+    # that isn't in the body raises KeyError (or gives the default for get).
+    def __getitem__(self, key):
+        if key == 'meta':
+            meta = self.meta
+            if 'meta' not in self.fields:
+                raise KeyError(key)
+            return meta
+        elif key == 'data':
+            if self.data_iterator is None and 'data' not in self.fields:
+                raise KeyError(key)
+            return self.data
+        return self.fields[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if key == 'data' and self.data_iterator is not None:
+            return True
+        if key not in self.fields:
+            self.read_past_data()
+        return key in self.fields
+
+    def keys(self):
+        self.read_past_data()
+        keys = list(self.fields)
+        if self.data_iterator is not None:
+            keys.append('data')
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    # reads keys of the top-level object up to the end, or up to a 'data'
+    # list, which is left for iterate_data().
+    def read_fields(self):
+        while True:
+            key = self.parser.next_key()
+            if key is None:
+                return
+
+            if key == 'data' and self.parser.peek() == '[':
+                self.data_iterator = self.iterate_data()
+                return
+            self.fields[key] = self.parser.value()
+
+    def iterate_data(self):
+        for item in self.parser.iterate_array():
+            if isinstance(item, dict) and self.model is not None:
+                item = self.model.from_dict(item)
+            yield item
+
+        # pick up anything after the list, such as 'meta'.
+        self.read_fields()
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_CHARACTERS = '-+.0123456789eE'
+
+
+# an incremental json parser for the handful of structures we need: it steps
+# through the keys of an object and the items of a list, and decodes each
+# value with the standard json decoder once enough of the body has arrived.
+# 'chunks' is an iterable of utf-8 encoded strings, such as a requests
+# Response's iter_content().  only the value being parsed is kept in memory.
+class JsonStreamParser:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.raw_decode = json.JSONDecoder().raw_decode
+        self.buffer = u''
+        self.position = 0
+        self.exhausted = False
+        self.first_key = False
+
+    # appends the next chunk to the buffer, dropping what's been parsed.
+    # returns False once the body has all been read.
+    def read_more(self):
+        while not self.exhausted:
+            try:
+                text = self.decoder.decode(next(self.chunks))
+            except StopIteration:
+                text = self.decoder.decode(b'', final=True)
+                self.exhausted = True
+
+            if text:
+                self.buffer = self.buffer[self.position:] + text
+                self.position = 0
+                return True
+        return False
+
+    # returns the next non-whitespace character without consuming it, or
+    # None at the end of the body.
+    def peek(self):
+        while True:
+            self.position = WHITESPACE.match(self.buffer,
+                                             self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more():
+                return None
+
+    def expect(self, characters):
+        c = self.peek()
+        if c is None or c not in characters:
+            raise ValueError('expected one of {!r} but found {!r}'.format(
+                characters, c))
+        self.position += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                (value, end) = self.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if not self.read_more():
+                    raise
+                continue
+
+            # a number at the end of the buffer may carry on in the next
+            # chunk.
+            if (end == len(self.buffer) and
+                    self.buffer[self.position] in NUMBER_CHARACTERS and
+                    self.read_more()):
+                continue
+
+            self.position = end
+            return value
+
+    def start_object(self):
+        self.expect('{')
+        self.first_key = True
+
+    # returns the next key of the object, or None at its end.
+    def next_key(self):
+        if self.peek() == '}':
+            self.position += 1
+            return None
+        if not self.first_key:
+            self.expect(',')
+        self.first_key = False
+
+        key = self.value()
+        self.expect(':')
+        return key
+
+    def iterate_array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
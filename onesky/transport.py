@@ -0,0 +1,44 @@
+import requests
+
+
+# a transport is what actually sends a request for the Client.  it needs a
+# single method:
+#
+#   request(method, url, params=None, files=None, headers=None, data=None)
+#
+# which returns a response object with the parts of the requests library's
+# Response interface that the Client uses: 'status_code', 'headers' (case
+# insensitive), json(), iter_content(chunk_size) and close().  the body should
+# be streamed so that large downloads aren't held in memory.  'data' is an
+# optional request body, which may be a generator of strings.
+
+
+# the default transport.  every request goes through the module-level
+# functions of the requests library (requests.get, requests.post, ...), so a
+# new connection is opened for each call.
+class RequestsTransport:
+    def request(self, method, url, params=None, files=None, headers=None,
+                data=None):
+        # method is something like GET or POST or DELETE, for which we grab
+        # the appropriate function from the requests library.
+        request_function = getattr(requests, method.lower())
+        return request_function(url, params=params, files=files,
+                                headers=headers, data=data, stream=True)
+
+
+# a faster transport for clients that make many calls.  a requests Session
+# keeps connections to the API server alive and reuses them, which saves a
+# TCP and TLS handshake on every request after the first.
+class SessionTransport:
+    def __init__(self, session=None):
+        if session is None:
+            session = requests.Session()
+        self.session = session
+
+    def request(self, method, url, params=None, files=None, headers=None,
+                data=None):
+        return self.session.request(method, url, params=params, files=files,
+                                    headers=headers, data=data, stream=True)
+
+    def close(self):
+        self.session.close()
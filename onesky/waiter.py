@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# import tasks finish with one of these statuses.
+FINISHED_STATUSES = ('completed', 'failed')
+
+# the most import tasks OneSky will return in one page.
+MAX_PER_PAGE = 100
+
+# when at least this many of a project's tasks finish in the same poll, their
+# statuses are looked for in the first page of the completed and failed lists
+# (two requests) before falling back to one import_task_show per task.
+BULK_LOOKUP_THRESHOLD = 3
+
+
+# an import task being waited on.  this works like a future: once the task
+# finishes, 'status' is set to 'completed' or 'failed', 'data' holds the
+# import task as returned by import_task_list (or import_task_show), and the
+# done callbacks are called with this object.
+class ImportTaskFuture:
+    def __init__(self, project_id, import_id):
+        self.project_id = project_id
+        self.import_id = import_id
+        self.status = None
+        self.data = None
+        self.callbacks = []
+        self.finished_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return '<ImportTaskFuture {} of project {}: {}>'.format(
+            self.import_id, self.project_id, self.status or 'in-progress')
+
+    def done(self):
+        return self.finished_event.is_set()
+
+    # blocks until the task is finished or 'timeout' seconds have passed.
+    # returns whether the task is finished.
+    def wait(self, timeout=None):
+        self.finished_event.wait(timeout)
+        return self.done()
+
+    # 'callback' is called with this task when it finishes, or right away if
+    # it already has.  as with concurrent.futures, exceptions raised by
+    # callbacks are logged and otherwise ignored, so that one bad callback
+    # can't stop the waiter.
+    def add_done_callback(self, callback):
+        with self.lock:
+            if not self.done():
+                self.callbacks.append(callback)
+                return
+        self.call(callback)
+
+    def finish(self, status, data):
+        with self.lock:
+            self.status = status
+            self.data = data
+            self.finished_event.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+
+        for callback in callbacks:
+            self.call(callback)
+
+    def call(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logger.exception('exception in callback for %r', self)
+
+
+# waits for any number of import tasks to finish, so that, for example, a
+# translation_export can start as soon as the file it depends on has been
+# imported:
+#
+#   waiter = onesky.waiter.ImportTaskWaiter(client)
+#   status, response = client.file_upload(project_id, 'strings.po', 'GNU_PO')
+#   task = waiter.add_upload(project_id, response, callback=on_imported)
+#   waiter.wait()
+#
+# rather than asking about each task separately, every poll fetches the list
+# of tasks that are still in progress for each project.  tasks that have
+# dropped off that list are looked up individually, unless several finished at
+# once, in which case the first pages of the completed and failed lists are
+# checked first.  the time between polls starts at 'min_interval' seconds and
+# is multiplied by 'backoff' each time nothing finishes, up to 'max_interval';
+# it drops back to 'min_interval' whenever a task does finish.
+#
+# wait() polls in the calling thread.  alternatively, start() polls in a
+# background thread, and callbacks are called from that thread.
+class ImportTaskWaiter:
+    def __init__(self, client, min_interval=1.0, max_interval=30.0,
+                 backoff=2.0):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+        # (project_id, import_id) -> ImportTaskFuture, for unfinished tasks.
+        self.tasks = {}
+        self.lock = threading.Lock()
+
+        # set to wake up the background thread when a task is added, or when
+        # it's being stopped.
+        self.wake_event = threading.Event()
+        self.thread = None
+        self.stopping = False
+
+    # starts waiting on an import task, and returns its ImportTaskFuture.
+    # the optional 'callback' is called with the ImportTaskFuture when it
+    # finishes.
+    def add(self, project_id, import_id, callback=None):
+        key = (str(project_id), str(import_id))
+        with self.lock:
+            task = self.tasks.get(key)
+            if task is None:
+                task = ImportTaskFuture(project_id, import_id)
+                self.tasks[key] = task
+                self.interval = self.min_interval
+
+                # so that the background thread, if any, checks on the new
+                # task now rather than at the end of a long backoff.
+                self.wake_event.set()
+
+        if callback is not None:
+            task.add_done_callback(callback)
+        return task
+
+    # same as add(), but takes the response from file_upload.
+    def add_upload(self, project_id, upload_response, callback=None):
+        import_id = upload_response['data']['import']['id']
+        return self.add(project_id, import_id, callback)
+
+    def pending(self):
+        with self.lock:
+            return list(self.tasks.values())
+
+    # checks on all of the unfinished tasks once.  returns the tasks that
+    # finished.
+    def poll(self):
+        by_project = {}
+        for task in self.pending():
+            by_project.setdefault(str(task.project_id), []).append(task)
+
+        finished = []
+        for project_id, tasks in by_project.items():
+            in_progress = self.list_import_tasks(project_id, 'in-progress')
+            if in_progress is None:
+                # couldn't get the list this time; try again next poll.
+                continue
+
+            # the tasks that have dropped off the in-progress list.
+            done = dict((str(task.import_id), task) for task in tasks
+                        if str(task.import_id) not in in_progress)
+
+            # if enough of them finished at once, look for them in the first
+            # page of each list of finished tasks.  only the first page is
+            # fetched, so the cost doesn't grow with the project's history.
+            results = {}
+            if len(done) >= BULK_LOOKUP_THRESHOLD:
+                for status in FINISHED_STATUSES:
+                    wanted = set(done) - set(results)
+                    if not wanted:
+                        break
+                    listed = self.list_import_tasks(project_id, status,
+                                                    max_pages=1)
+                    for import_id, data in (listed or {}).items():
+                        if import_id in wanted:
+                            results[import_id] = (status, data)
+
+            # anything else is looked up on its own.
+            for import_id, task in done.items():
+                if import_id not in results:
+                    result = self.show_import_task(task)
+                    if result is None:
+                        continue
+                    results[import_id] = result
+
+                (status, data) = results[import_id]
+                with self.lock:
+                    self.tasks.pop((str(task.project_id), import_id), None)
+                task.finish(status, data)
+                finished.append(task)
+
+        with self.lock:
+            if finished:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff,
+                                    self.max_interval)
+        return finished
+
+    # returns the project's import tasks with the given status, as a
+    # dictionary of id (as a string) -> task, or None if a request failed.
+    # if 'max_pages' is given, at most that many pages are fetched.
+    def list_import_tasks(self, project_id, status, max_pages=None):
+        tasks = {}
+        page = 1
+        page_count = 1
+        while page <= page_count and (max_pages is None or
+                                      page <= max_pages):
+            (status_code, response) = self.client.import_task_list(
+                project_id, page=page, per_page=MAX_PER_PAGE, status=status)
+            if status_code != 200:
+                return None
+
+            for task in response.get('data', []):
+                tasks[str(task['id'])] = task
+
+            # meta.next_page is a url, so count pages ourselves.
+            page_count = response.get('meta', {}).get('page_count') or 1
+            page += 1
+        return tasks
+
+    # looks up a single import task.  returns (status, data) if it has
+    # finished, or None.
+    def show_import_task(self, task):
+        (status_code, response) = self.client.import_task_show(
+            task.project_id, task.import_id)
+        data = response.get('data') or {}
+        if status_code == 200:
+            status = data.get('status')
+        elif status_code == 404:
+            status = 'failed'
+        else:
+            return None
+
+        if status not in FINISHED_STATUSES:
+            return None
+        return (status, data)
+
+    # polls until every task has finished, or until 'timeout' seconds have
+    # passed.  returns whether every task has finished.
+    def wait(self, timeout=None):
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        while True:
+            self.poll()
+            if not self.pending():
+                return True
+
+            interval = self.interval
+            if timeout is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+
+    # polls in a background thread until stop() is called.
+    def start(self):
+        if self.thread is not None:
+            return
+
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.stopping = True
+        self.wake_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        while True:
+            # clear before checking 'stopping', so that a stop() in between
+            # can't be missed.
+            self.wake_event.clear()
+            if self.stopping:
+                break
+
+            if self.pending():
+                try:
+                    self.poll()
+                except Exception:
+                    # connection problems, a body cut off partway, and the
+                    # like.  this thread is all that's resolving the pending
+                    # tasks, so log it, back off and try again.
+                    logger.exception('exception while polling import tasks')
+                    with self.lock:
+                        self.interval = min(self.interval * self.backoff,
+                                            self.max_interval)
+                self.wake_event.wait(self.interval)
+            else:
+                # nothing to do until a task is added.
+                self.wake_event.wait()
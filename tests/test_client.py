@@ -1,9 +1,13 @@
 
+import base64
 import collections
 import hashlib
+import json
 import mock
 import os
 import requests
+import shutil
+import tempfile
 import unittest
 
 import onesky.client
@@ -26,6 +30,23 @@ def mock_requests_function(*args, **kwargs):
     return MockResponse()
 
 
+# transport that records each request, decoding any json body, and answers
+# with a MockResponse.
+class RecordingTransport:
+    def __init__(self):
+        self.requests_made = []
+
+    def request(self, method, url, params=None, files=None, headers=None,
+                data=None):
+        if data is not None and not isinstance(data, basestring):
+            data = ''.join(data)
+        self.requests_made.append({
+            'method': method, 'url': url, 'params': params,
+            'headers': headers,
+            'body': json.loads(data) if data is not None else None})
+        return MockResponse()
+
+
 class ClientTestCase(unittest.TestCase):
     def setUp(self):
         # we mock out all of the http requests and just make sure the correct
@@ -252,9 +273,58 @@ class ClientTestCase(unittest.TestCase):
                      'GET', 'projects/{}/import-tasks/{}',
                      ['project_id', 'import_id'], [])
 
-    def test_screenshot(self):
-        # wrapper for the screenshot stuff is not yet implemented
-        pass
+    def test_screenshot_upload(self):
+        image_file = os.path.join(os.path.dirname(__file__),
+                                  'test_strings.pot')
+        tags = [{'key': 'hello', 'x': 0, 'y': 0, 'width': 10, 'height': 10,
+                 'file': 'test_strings.pot'}]
+        recorder = RecordingTransport()
+        self.client.transport = recorder
+
+        self.client.screenshot_upload(
+            'param0', [{'image': image_file, 'tags': tags},
+                       {'image': image_file, 'name': 'other.png'}])
+
+        self.assertEqual(len(recorder.requests_made), 1)
+        request = recorder.requests_made[0]
+        self.assertEqual(request['method'], 'POST')
+        self.assertEqual(request['url'],
+                         self.client.api_url + 'projects/param0/screenshots')
+        self.assertEqual(request['headers']['Content-Type'],
+                         'application/json')
+
+        with open(image_file, 'rb') as f:
+            image = f.read()
+        screenshots = request['body']['screenshots']
+        self.assertEqual(
+            [(s['name'], base64.b64decode(s['image']), s['tags'])
+             for s in screenshots],
+            [('test_strings.pot', image, tags), ('other.png', image, [])])
+
+    def test_screenshot_upload_batched(self):
+        image_file = os.path.join(os.path.dirname(__file__),
+                                  'test_strings.pot')
+        recorder = RecordingTransport()
+        self.client.transport = recorder
+
+        screenshots = [{'image': image_file, 'name': 'image{}'.format(i)}
+                       for i in range(7)]
+        results = self.client.screenshot_upload_batched(
+            'param0', screenshots, batch_size=3, threads=2)
+
+        def batch_sizes():
+            return sorted(len(request['body']['screenshots'])
+                          for request in recorder.requests_made)
+
+        self.assertEqual(results, [(200, {})] * 3)
+        self.assertEqual(batch_sizes(), [1, 3, 3])
+
+        # a missing image is caught before any batch is sent
+        screenshots.append({'image': image_file + '.missing'})
+        self.assertRaises(IOError,
+                          self.client.screenshot_upload_batched,
+                          'param0', screenshots, batch_size=3, threads=2)
+        self.assertEqual(batch_sizes(), [1, 3, 3])
 
     def test_quotation_show(self):
         self.execute('quotation_show',
@@ -287,3 +357,191 @@ class ClientTestCase(unittest.TestCase):
 
     def test_locale_list(self):
         self.execute('locale_list', 'GET', 'locales')
+
+
+# mock object to return a file download from requests.  'truncate_at' cuts the
+# body short to simulate a dropped connection.  Range requests are honored
+# only if If-Range matches 'etag'.
+class MockDownloadResponse():
+    def __init__(self, filename, content, request_headers, truncate_at=None,
+                 etag=None, range_start=None):
+        self.headers = requests.structures.CaseInsensitiveDict()
+        self.headers['content-disposition'] = (
+            'attachment; filename={}'.format(filename))
+        if etag is not None:
+            self.headers['etag'] = etag
+
+        range_header = request_headers.get('Range')
+        if request_headers.get('If-Range') != etag:
+            range_header = None
+        if range_header:
+            start = int(range_header[len('bytes='):-1])
+            if range_start is not None:
+                # a server that sends a different range than it was asked for
+                start = range_start
+            if start >= len(content):
+                self.status_code = 416
+                self.headers = requests.structures.CaseInsensitiveDict()
+                self.body = ''
+                return
+            self.status_code = 206
+            self.headers['content-range'] = 'bytes {}-{}/{}'.format(
+                start, len(content) - 1, len(content))
+            self.body = content[start:]
+        else:
+            self.status_code = 200
+            self.body = content
+
+        self.headers['content-length'] = str(len(self.body))
+        if truncate_at is not None:
+            self.body = self.body[:truncate_at]
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def json(self):
+        raise ValueError()
+
+    def close(self):
+        pass
+
+
+class DownloadTestCase(unittest.TestCase):
+    CONTENT = 'msgid "hello"\nmsgstr "namaste"\n' * 100
+
+    def setUp(self):
+        self.download_dir = tempfile.mkdtemp()
+        self.client = onesky.client.Client(TEST_API_KEY, TEST_API_SECRET,
+                                           download_dir=self.download_dir)
+        self.requests_made = []
+        self.truncate_at = None
+        self.content = self.CONTENT
+        self.etag = '"v1"'
+        self.range_start = None
+        self.pending = False
+
+    def tearDown(self):
+        shutil.rmtree(self.download_dir)
+
+    def mock_get(self, url, params=None, headers=None, **kwargs):
+        self.requests_made.append(dict(headers or {}))
+        if self.pending:
+            # OneSky is still building the export
+            response = MockResponse()
+            response.status_code = 202
+            return response
+
+        truncate_at = self.truncate_at
+        self.truncate_at = None
+        range_start = self.range_start
+        self.range_start = None
+        return MockDownloadResponse('hi-IN.po', self.content, headers or {},
+                                    truncate_at, self.etag, range_start)
+
+    def export(self):
+        with mock.patch.object(requests, 'get', self.mock_get):
+            return self.client.translation_export(1, 'hi-IN', 'strings.pot')
+
+    def read_download(self):
+        with open(os.path.join(self.download_dir, 'hi-IN.po'), 'rb') as f:
+            return f.read()
+
+    def test_download(self):
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(result['downloaded_filename'],
+                         os.path.join(self.download_dir, 'hi-IN.po'))
+        self.assertEqual(self.read_download(), self.CONTENT)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_resume_download(self):
+        self.truncate_at = 1000
+        self.assertRaises(IOError, self.export)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.download_dir, 'hi-IN.po')))
+
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 206)
+        self.assertEqual(self.requests_made[-1].get('Range'), 'bytes=1000-')
+        self.assertEqual(self.requests_made[-1].get('If-Range'), '"v1"')
+        self.assertEqual(self.read_download(), self.CONTENT)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_resume_changed_download(self):
+        # if the file changes between attempts, the server sends all of the
+        # new version instead of appending its tail to the old prefix.
+        self.truncate_at = 1000
+        self.assertRaises(IOError, self.export)
+
+        self.content = self.CONTENT.replace('namaste', 'NAMASTE')
+        self.etag = '"v2"'
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.requests_made[-1].get('If-Range'), '"v1"')
+        self.assertEqual(self.read_download(), self.content)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_resume_without_validator(self):
+        # with no ETag or Last-Modified, a partial download is started over
+        # rather than resumed.
+        self.etag = None
+        self.truncate_at = 1000
+        try:
+            self.export()
+            self.fail('expected an IOError')
+        except IOError as e:
+            self.assertTrue('will start over' in str(e))
+
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.requests_made[-1].get('Range'), None)
+        self.assertEqual(self.read_download(), self.CONTENT)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_stale_partial_download(self):
+        # a partial file that is already complete can't be resumed; it should
+        # be discarded and the whole file fetched again.
+        partial_filename = os.path.join(self.download_dir,
+                                        '.1-hi-IN-strings.pot.part')
+        with open(partial_filename, 'wb') as f:
+            f.write(self.CONTENT)
+        with open(partial_filename + '.validator', 'wb') as f:
+            f.write(self.etag)
+
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.read_download(), self.CONTENT)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_resume_wrong_range(self):
+        # if the server sends a range starting somewhere other than where we
+        # asked, the partial file is thrown away and the whole file fetched.
+        self.truncate_at = 1000
+        self.assertRaises(IOError, self.export)
+
+        self.range_start = 500
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.requests_made[-2].get('Range'), 'bytes=1000-')
+        self.assertEqual(self.requests_made[-1].get('Range'), None)
+        self.assertEqual(self.read_download(), self.CONTENT)
+        self.assertEqual(os.listdir(self.download_dir), ['hi-IN.po'])
+
+    def test_export_pending(self):
+        # a json response while the export is being built leaves the partial
+        # file alone, so it can still be resumed afterwards.
+        self.truncate_at = 1000
+        self.assertRaises(IOError, self.export)
+
+        self.pending = True
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 202)
+        self.assertEqual(result, {})
+        self.assertFalse(os.path.exists(
+            os.path.join(self.download_dir, 'hi-IN.po')))
+
+        self.pending = False
+        (status_code, result) = self.export()
+        self.assertEqual(status_code, 206)
+        self.assertEqual(self.read_download(), self.CONTENT)
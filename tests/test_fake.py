@@ -0,0 +1,142 @@
+
+import os
+import unittest
+
+import onesky.client
+import onesky.fake
+
+
+TEST_API_KEY = 'aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa'
+TEST_API_SECRET = 'bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb'
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), 'test_strings.pot')
+
+
+class FakeTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fake = onesky.fake.FakeTransport()
+        self.client = onesky.client.Client(TEST_API_KEY, TEST_API_SECRET,
+                                           transport=self.fake)
+
+    def create_project(self):
+        (status_code, response) = self.client.project_group_create('group')
+        self.assertEqual(status_code, 201)
+        group_id = response['data']['id']
+
+        (status_code, response) = self.client.project_create(
+            group_id, 'website', name='site')
+        self.assertEqual(status_code, 201)
+        return (group_id, response['data']['id'])
+
+    def test_project_group(self):
+        (status_code, response) = self.client.project_group_create('group')
+        group_id = response['data']['id']
+
+        (status_code, response) = self.client.project_group_show(group_id)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response['data']['name'], 'group')
+
+        (status_code, response) = self.client.project_group_list()
+        self.assertEqual(response['meta']['record_count'], 1)
+
+        (status_code, response) = self.client.project_group_delete(group_id)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response, {})
+
+        (status_code, response) = self.client.project_group_show(group_id)
+        self.assertEqual(status_code, 404)
+
+    def test_project(self):
+        (group_id, project_id) = self.create_project()
+
+        self.client.project_update(project_id, description='words')
+        (status_code, response) = self.client.project_show(project_id)
+        self.assertEqual(response['data']['name'], 'site')
+        self.assertEqual(response['data']['description'], 'words')
+        self.assertEqual(response['data']['project_type']['code'], 'website')
+
+        (status_code, response) = self.client.project_list(group_id)
+        self.assertEqual([p['id'] for p in response['data']], [project_id])
+
+        (status_code, response) = self.client.project_create(group_id, 'tv')
+        self.assertEqual(status_code, 400)
+
+    def test_pagination(self):
+        for i in range(5):
+            self.client.project_group_create('group{}'.format(i))
+
+        (status_code, response) = self.client.project_group_list(
+            page=2, per_page=2)
+        self.assertEqual([g['name'] for g in response['data']],
+                         ['group2', 'group3'])
+        self.assertEqual(response['meta']['page_count'], 3)
+        self.assertEqual(response['meta']['prev_page'],
+                         self.client.api_url +
+                         'project-groups?page=1&per_page=2')
+        self.assertEqual(response['meta']['next_page'],
+                         self.client.api_url +
+                         'project-groups?page=3&per_page=2')
+
+    def test_file_upload(self):
+        (group_id, project_id) = self.create_project()
+
+        (status_code, response) = self.client.file_upload(
+            project_id, TEST_FILE, 'GNU_POT')
+        self.assertEqual(status_code, 201)
+        self.assertEqual(response['data']['name'], 'test_strings.pot')
+        import_id = response['data']['import']['id']
+
+        (status_code, response) = self.client.import_task_show(project_id,
+                                                               import_id)
+        self.assertEqual(response['data']['status'], 'completed')
+        self.assertEqual(response['data']['file']['name'], 'test_strings.pot')
+
+        (status_code, response) = self.client.file_list(project_id)
+        self.assertEqual(response['data'][0]['file_name'], 'test_strings.pot')
+        self.assertEqual(response['data'][0]['last_import']['id'], import_id)
+
+        (status_code, response) = self.client.file_delete(project_id,
+                                                          'test_strings.pot')
+        self.assertEqual(status_code, 200)
+        (status_code, response) = self.client.file_list(project_id)
+        self.assertEqual(response['data'], [])
+
+    def test_import_task_status(self):
+        self.fake.auto_complete_imports = False
+        (group_id, project_id) = self.create_project()
+
+        (status_code, response) = self.client.file_upload(
+            project_id, TEST_FILE, 'GNU_POT')
+        import_id = response['data']['import']['id']
+
+        (status_code, response) = self.client.import_task_list(
+            project_id, status='in-progress')
+        self.assertEqual([t['id'] for t in response['data']], [import_id])
+
+        self.fake.complete_import_task(import_id)
+        (status_code, response) = self.client.import_task_list(
+            project_id, status='in-progress')
+        self.assertEqual(response['data'], [])
+        (status_code, response) = self.client.import_task_list(
+            project_id, status='completed')
+        self.assertEqual([t['id'] for t in response['data']], [import_id])
+
+    def test_screenshot_upload(self):
+        (group_id, project_id) = self.create_project()
+
+        screenshots = [{'image': TEST_FILE, 'name': 'image{}.png'.format(i)}
+                       for i in range(5)]
+        results = self.client.screenshot_upload_batched(
+            project_id, screenshots, batch_size=2)
+        self.assertEqual([status_code for (status_code, _) in results],
+                         [201, 201, 201])
+
+        with open(TEST_FILE, 'rb') as f:
+            image = f.read()
+        self.assertEqual(len(self.fake.screenshots), 5)
+        self.assertEqual(self.fake.screenshots[(project_id, 'image4.png')],
+                         {'image': image, 'tags': []})
+
+    def test_unknown_endpoint(self):
+        (status_code, response) = self.client.locale_list()
+        self.assertEqual(status_code, 404)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import unittest
+
+import onesky.client
+import onesky.fake
+import onesky.models
+import onesky.waiter
+
+
+TEST_API_KEY = 'aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa'
+TEST_API_SECRET = 'bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb'
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), 'test_strings.pot')
+
+
+def chunked(body, chunk_size):
+    return [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+
+class ApiResponseTestCase(unittest.TestCase):
+    BODY = {
+        'meta': {'status': 200, 'record_count': 3, 'next_page': None},
+        'data': [
+            {'code': 'hi-IN', 'english_name': 'Hindi',
+             'local_name': u'हिन्दी',
+             'is_base_language': False, 'ignored': [1, {'a': 2}]},
+            {'code': 'en-US', 'english_name': 'English',
+             'is_base_language': True, 'translation_progress': 1234.5e-2},
+            {'code': 'fr-FR', 'english_name': 'French'},
+        ]
+    }
+
+    def expected_locales(self):
+        return [onesky.models.Locale.from_dict(item)
+                for item in self.BODY['data']]
+
+    def parse(self, body, chunk_size):
+        encoded = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        return onesky.models.ApiResponse(chunked(encoded, chunk_size),
+                                         onesky.models.Locale)
+
+    def test_list(self):
+        # every chunk size, down to splitting multi-byte characters
+        for chunk_size in [1, 2, 3, 7, 64, 100000]:
+            response = self.parse(self.BODY, chunk_size)
+            self.assertEqual(response.meta, self.BODY['meta'])
+            self.assertEqual(list(response.data), self.expected_locales())
+
+    def test_list_is_lazy(self):
+        response = self.parse(self.BODY, 1)
+        first = next(response.data)
+        self.assertEqual(first.local_name, u'हिन्दी')
+        self.assertFalse(response.parser.exhausted)
+
+    def test_meta_after_data(self):
+        body = ('{"data": [{"code": "hi-IN"}, {"code": "en-US"}], '
+                '"meta": {"status": 200, "record_count": 2}}')
+        response = onesky.models.ApiResponse(chunked(body, 5),
+                                             onesky.models.Locale)
+        self.assertEqual(response['meta']['record_count'], 2)
+        self.assertEqual([locale['code'] for locale in response['data']],
+                         ['hi-IN', 'en-US'])
+
+    def test_empty_list(self):
+        response = self.parse({'meta': {'status': 200}, 'data': []}, 3)
+        self.assertEqual(list(response.data), [])
+
+    def test_single_object(self):
+        response = self.parse({'meta': {'status': 200},
+                               'data': self.BODY['data'][0]}, 4)
+        self.assertEqual(response.data, self.expected_locales()[0])
+
+    def test_missing_keys(self):
+        # error bodies may have no 'data'; this should behave like a dict
+        response = onesky.models.ApiResponse(['{"meta": {"status": 500}}'],
+                                             onesky.models.Locale)
+        self.assertEqual(response.get('data', []), [])
+        self.assertRaises(KeyError, lambda: response['data'])
+        self.assertEqual(response['meta'], {'status': 500})
+
+        response = onesky.models.ApiResponse(['{"data": []}'],
+                                             onesky.models.Locale)
+        self.assertEqual(response.get('meta', 'none'), 'none')
+        self.assertEqual(response.meta, {})
+
+    def test_membership(self):
+        response = self.parse(self.BODY, 7)
+        self.assertTrue('data' in response)
+        self.assertTrue('meta' in response)
+        self.assertFalse('other' in response)
+        self.assertEqual(sorted(response.keys()), ['data', 'meta'])
+        self.assertEqual(sorted(response), ['data', 'meta'])
+
+        # looking for a key after the list reads past it, but the items are
+        # kept
+        body = '{"data": [{"code": "hi-IN"}], "meta": {"status": 200}}'
+        response = onesky.models.ApiResponse([body], onesky.models.Locale)
+        self.assertTrue('meta' in response)
+        self.assertEqual([locale.code for locale in response.data],
+                         ['hi-IN'])
+
+        response = onesky.models.ApiResponse(['{"meta": {}}'],
+                                             onesky.models.Locale)
+        self.assertFalse('data' in response)
+        self.assertEqual(response.keys(), ['meta'])
+
+        locale = self.expected_locales()[0]
+        self.assertTrue('code' in locale)
+        self.assertFalse('other' in locale)
+        self.assertEqual(locale.keys(), list(onesky.models.Locale.__slots__))
+        self.assertEqual(dict((key, locale[key]) for key in locale),
+                         locale.as_dict())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, onesky.models.ApiResponse,
+                          ['not json'], onesky.models.Locale)
+        response = onesky.models.ApiResponse(['{"data": [{"code": 1}, '],
+                                             onesky.models.Locale)
+        self.assertRaises(ValueError, list, response.data)
+
+    def test_model(self):
+        project = onesky.models.Project(id=1, name='site')
+        self.assertEqual(project['name'], 'site')
+        self.assertEqual(project.get('description', 'none'), None)
+        self.assertEqual(project.get('other', 'none'), 'none')
+        self.assertRaises(KeyError, lambda: project['other'])
+        self.assertRaises(AttributeError, setattr, project, 'other', 1)
+
+
+class ResponseModelsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fake = onesky.fake.FakeTransport(auto_complete_imports=False)
+        self.client = onesky.client.Client(TEST_API_KEY, TEST_API_SECRET,
+                                           transport=self.fake,
+                                           response_models=True)
+
+        (status_code, response) = self.client.project_group_create('group')
+        self.assertEqual(status_code, 201)
+        self.assertTrue(isinstance(response.data,
+                                   onesky.models.ProjectGroup))
+        self.group_id = response.data.id
+
+        (status_code, response) = self.client.project_create(
+            self.group_id, 'website', name='site')
+        self.project_id = response.data.id
+
+    def test_models(self):
+        (status_code, response) = self.client.project_list(self.group_id)
+        self.assertEqual(list(response.data),
+                         [onesky.models.Project(id=self.project_id,
+                                                name='site')])
+
+        (status_code, response) = self.client.file_upload(
+            self.project_id, TEST_FILE, 'GNU_POT')
+        # file_upload has no model, so its response is a plain dictionary
+        self.assertEqual(response['data']['name'], 'test_strings.pot')
+
+        (status_code, response) = self.client.file_list(self.project_id)
+        files = list(response.data)
+        self.assertEqual([f.file_name for f in files], ['test_strings.pot'])
+
+        (status_code, response) = self.client.import_task_list(
+            self.project_id)
+        self.assertEqual([task.status for task in response.data],
+                         ['in-progress'])
+
+    def test_error(self):
+        (status_code, response) = self.client.project_show(12345)
+        self.assertEqual(status_code, 404)
+        self.assertEqual(response.meta['message'], 'Project not found')
+
+    def test_empty_response(self):
+        (status_code, response) = self.client.project_group_delete(
+            self.group_id)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response, {})
+
+    def test_waiter(self):
+        waiter = onesky.waiter.ImportTaskWaiter(self.client,
+                                                min_interval=0.001)
+        (status_code, response) = self.client.file_upload(
+            self.project_id, TEST_FILE, 'GNU_POT')
+        task = waiter.add_upload(self.project_id, response)
+
+        self.assertEqual(waiter.poll(), [])
+        self.fake.complete_import_task(task.import_id)
+        self.assertEqual(waiter.poll(), [task])
+        self.assertEqual(task.status, 'completed')
+        self.assertEqual(task.data.file['name'], 'test_strings.pot')
@@ -0,0 +1,232 @@
+
+import os
+import threading
+import unittest
+
+import onesky.client
+import onesky.fake
+import onesky.waiter
+
+
+TEST_API_KEY = 'aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa'
+TEST_API_SECRET = 'bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb'
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), 'test_strings.pot')
+
+
+def import_id(task):
+    return task.import_id
+
+
+class ImportTaskWaiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fake = onesky.fake.FakeTransport(auto_complete_imports=False)
+        self.requests_made = []
+        self.client = onesky.client.Client(
+            TEST_API_KEY, TEST_API_SECRET, transport=self.fake,
+            request_callback=self.on_http_request)
+        self.waiter = onesky.waiter.ImportTaskWaiter(
+            self.client, min_interval=0.001, max_interval=0.01)
+
+        (status_code, response) = self.client.project_group_create('group')
+        (status_code, response) = self.client.project_create(
+            response['data']['id'], 'website')
+        self.project_id = response['data']['id']
+
+    def tearDown(self):
+        self.waiter.stop()
+
+    def on_http_request(self, method, url, params):
+        self.requests_made.append((method, url, params))
+
+    # the last part of the url and the status parameter of each request
+    def requests_summary(self):
+        return [(url.rsplit('/', 1)[-1], params.get('status'))
+                for (method, url, params) in self.requests_made]
+
+    def upload(self):
+        (status_code, response) = self.client.file_upload(
+            self.project_id, TEST_FILE, 'GNU_POT')
+        return response
+
+    def test_poll(self):
+        finished = []
+        tasks = [self.waiter.add_upload(self.project_id, self.upload(),
+                                        callback=finished.append)
+                 for i in range(3)]
+
+        del self.requests_made[:]
+        self.assertEqual(self.waiter.poll(), [])
+        self.assertEqual(finished, [])
+        # one list request covers all of the tasks
+        self.assertEqual(len(self.requests_made), 1)
+
+        self.fake.complete_import_task(tasks[0].import_id)
+        self.fake.complete_import_task(tasks[2].import_id, 'failed')
+        del self.requests_made[:]
+        self.assertEqual(sorted(self.waiter.poll(), key=import_id),
+                         [tasks[0], tasks[2]])
+        # with only two finished, each is looked up on its own
+        self.assertEqual(self.requests_summary()[0],
+                         ('import-tasks', 'in-progress'))
+        self.assertEqual(sorted(self.requests_summary()[1:]),
+                         [(str(tasks[0].import_id), None),
+                          (str(tasks[2].import_id), None)])
+        self.assertEqual(sorted(finished, key=import_id), [tasks[0], tasks[2]])
+        self.assertEqual(tasks[0].status, 'completed')
+        self.assertEqual(tasks[2].status, 'failed')
+        self.assertEqual(tasks[0].data['file']['name'], 'test_strings.pot')
+        self.assertFalse(tasks[1].done())
+        self.assertEqual(self.waiter.pending(), [tasks[1]])
+
+        # callbacks added after the task has finished are called right away
+        tasks[0].add_done_callback(finished.append)
+        self.assertEqual(finished[-1], tasks[0])
+
+    def test_bulk_lookup(self):
+        tasks = [self.waiter.add_upload(self.project_id, self.upload())
+                 for i in range(4)]
+        for task in tasks[:2]:
+            self.fake.complete_import_task(task.import_id)
+        self.fake.complete_import_task(tasks[2].import_id, 'failed')
+
+        # three finished at once, so their statuses come from the completed
+        # and failed lists rather than from looking up each task
+        del self.requests_made[:]
+        self.assertEqual(sorted(self.waiter.poll(), key=import_id),
+                         tasks[:3])
+        self.assertEqual(self.requests_summary(),
+                         [('import-tasks', 'in-progress'),
+                          ('import-tasks', 'completed'),
+                          ('import-tasks', 'failed')])
+        self.assertEqual([task.status for task in tasks[:3]],
+                         ['completed', 'completed', 'failed'])
+
+    def test_long_history(self):
+        # the cost of a poll shouldn't depend on how many imports the project
+        # has had before
+        self.fake.auto_complete_imports = True
+        for i in range(1000):
+            self.upload()
+        self.fake.auto_complete_imports = False
+
+        task = self.waiter.add_upload(self.project_id, self.upload())
+        self.fake.complete_import_task(task.import_id, 'failed')
+        del self.requests_made[:]
+        self.assertEqual(self.waiter.poll(), [task])
+        self.assertEqual(task.status, 'failed')
+        self.assertEqual(len(self.requests_made), 2)
+
+        # even when several finish at once and aren't on the first page of
+        # the finished lists
+        tasks = [self.waiter.add_upload(self.project_id, self.upload())
+                 for i in range(3)]
+        for task in tasks:
+            self.fake.complete_import_task(task.import_id)
+        del self.requests_made[:]
+        self.assertEqual(sorted(self.waiter.poll(), key=import_id), tasks)
+        self.assertEqual(len(self.requests_made), 6)
+
+    def test_pages(self):
+        tasks = [self.waiter.add_upload(self.project_id, self.upload())
+                 for i in range(onesky.waiter.MAX_PER_PAGE + 1)]
+
+        del self.requests_made[:]
+        self.assertEqual(self.waiter.poll(), [])
+        self.assertEqual([params['page']
+                          for (method, url, params) in self.requests_made],
+                         [1, 2])
+
+        self.fake.complete_import_task(tasks[-1].import_id)
+        self.assertEqual(self.waiter.poll(), [tasks[-1]])
+
+    def test_backoff(self):
+        self.waiter.add_upload(self.project_id, self.upload())
+
+        self.waiter.poll()
+        self.assertEqual(self.waiter.interval, 0.002)
+        for i in range(5):
+            self.waiter.poll()
+        self.assertEqual(self.waiter.interval, 0.01)
+
+        # adding a task resets the interval
+        self.waiter.add_upload(self.project_id, self.upload())
+        self.assertEqual(self.waiter.interval, 0.001)
+
+    def test_wait(self):
+        task = self.waiter.add_upload(self.project_id, self.upload())
+        self.assertFalse(self.waiter.wait(timeout=0.01))
+
+        self.fake.complete_import_task(task.import_id)
+        self.assertTrue(self.waiter.wait(timeout=1))
+        self.assertEqual(task.status, 'completed')
+
+    def test_background(self):
+        finished = threading.Event()
+        self.waiter.start()
+
+        task = self.waiter.add_upload(self.project_id, self.upload(),
+                                      callback=lambda task: finished.set())
+        self.assertFalse(task.wait(0.01))
+
+        self.fake.complete_import_task(task.import_id)
+        self.assertTrue(finished.wait(1))
+        self.assertEqual(task.status, 'completed')
+
+    def test_callback_exception(self):
+        # a callback that raises mustn't stop the background thread
+        def bad_callback(task):
+            raise RuntimeError('oops')
+
+        finished = threading.Event()
+        self.waiter.start()
+
+        first = self.waiter.add_upload(self.project_id, self.upload(),
+                                       callback=bad_callback)
+        self.fake.complete_import_task(first.import_id)
+        self.assertTrue(first.wait(1))
+
+        second = self.waiter.add_upload(self.project_id, self.upload(),
+                                        callback=lambda task: finished.set())
+        self.fake.complete_import_task(second.import_id)
+        self.assertTrue(finished.wait(1))
+        self.assertTrue(self.waiter.thread.is_alive())
+
+        # callbacks added after the task finished are protected too
+        first.add_done_callback(bad_callback)
+
+    def test_background_poll_exception(self):
+        # an unexpected exception from a poll mustn't stop the background
+        # thread
+        fake = self.fake
+        failures = [ValueError('truncated body'), KeyError('id')]
+
+        class FailingTransport:
+            def request(self, *args, **kwargs):
+                if failures:
+                    raise failures.pop(0)
+                return fake.request(*args, **kwargs)
+
+        task = self.waiter.add_upload(self.project_id, self.upload())
+        self.fake.complete_import_task(task.import_id)
+
+        self.client.transport = FailingTransport()
+        self.waiter.start()
+        self.assertTrue(task.wait(1))
+        self.assertEqual(failures, [])
+        self.assertTrue(self.waiter.thread.is_alive())
+
+    def test_background_add_wakes(self):
+        # a task added while the background thread is backed off is checked
+        # right away, not at the end of the interval
+        self.waiter.max_interval = 60
+        first = self.waiter.add_upload(self.project_id, self.upload())
+        self.waiter.interval = 60
+        self.waiter.start()
+        self.assertFalse(first.wait(0.05))
+
+        (status_code, response) = self.client.file_upload(
+            self.project_id, TEST_FILE, 'GNU_POT')
+        self.fake.complete_import_task(response['data']['import']['id'])
+        second = self.waiter.add_upload(self.project_id, response)
+        self.assertTrue(second.wait(1))